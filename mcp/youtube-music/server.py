@@ -2,10 +2,10 @@
 """MCP Server for YouTube Music playlist analysis and recommendations."""
 
 import asyncio
-import json
-from collections import Counter
-from typing import Any
+from collections import Counter, defaultdict
+from typing import Any, Awaitable, Callable, Optional
 
+import orjson
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
@@ -62,7 +62,7 @@ async def list_tools() -> list[Tool]:
                     "video_ids": {
                         "type": "array",
                         "items": {"type": "string"},
-                        "description": "List of YouTube video IDs (max 50)",
+                        "description": "List of YouTube video IDs",
                     }
                 },
                 "required": ["video_ids"],
@@ -104,41 +104,78 @@ async def list_tools() -> list[Tool]:
     ]
 
 
+async def _handle_get_my_playlists(client: YouTubeClient, arguments: dict[str, Any]) -> list[TextContent]:
+    """Handle the get_my_playlists tool."""
+    max_results = arguments.get("max_results", 50)
+    playlists = client.get_my_playlists(max_results=max_results)
+    return [TextContent(type="text", text=orjson.dumps(playlists).decode())]
+
+
+async def _handle_get_playlist_items(client: YouTubeClient, arguments: dict[str, Any]) -> list[TextContent]:
+    """Handle the get_playlist_items tool."""
+    playlist_id = arguments["playlist_id"]
+    max_results = arguments.get("max_results", 200)
+    items = client.get_playlist_items(playlist_id, max_results=max_results)
+    return [TextContent(type="text", text=orjson.dumps(items).decode())]
+
+
+async def _handle_get_video_details(client: YouTubeClient, arguments: dict[str, Any]) -> list[TextContent]:
+    """Handle the get_video_details tool."""
+    video_ids = arguments["video_ids"]
+    details = client.get_video_details(video_ids)
+    return [TextContent(type="text", text=orjson.dumps(details).decode())]
+
+
+async def _handle_search_music(client: YouTubeClient, arguments: dict[str, Any]) -> list[TextContent]:
+    """Handle the search_music tool."""
+    query = arguments["query"]
+    max_results = arguments.get("max_results", 10)
+    results = client.search_music(query, max_results=max_results)
+    return [TextContent(type="text", text=orjson.dumps(results).decode())]
+
+
+async def _handle_analyze_playlist(client: YouTubeClient, arguments: dict[str, Any]) -> list[TextContent]:
+    """Handle the analyze_playlist tool.
+
+    If the client supplied a progress token, partial results are sent as
+    progress notifications while the playlist is being scanned.
+    """
+    playlist_id = arguments["playlist_id"]
+
+    progress = None
+    ctx = server.request_context
+    progress_token = ctx.meta.progressToken if ctx.meta else None
+    if progress_token is not None:
+        async def progress(tracks_scanned: int, message: str) -> None:
+            await ctx.session.send_progress_notification(
+                progress_token, tracks_scanned, message=message
+            )
+
+    analysis = await analyze_playlist_patterns(client, playlist_id, progress=progress)
+    return [TextContent(type="text", text=orjson.dumps(analysis).decode())]
+
+
+# Tool name -> handler
+_DISPATCH = {
+    "get_my_playlists": _handle_get_my_playlists,
+    "get_playlist_items": _handle_get_playlist_items,
+    "get_video_details": _handle_get_video_details,
+    "search_music": _handle_search_music,
+    "analyze_playlist": _handle_analyze_playlist,
+}
+
+
 @server.call_tool()
 async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
     """Handle tool calls."""
+    handler = _DISPATCH.get(name)
+    if handler is None:
+        return [TextContent(type="text", text=f"Unknown tool: {name}")]
+
     client = get_client()
 
     try:
-        if name == "get_my_playlists":
-            max_results = arguments.get("max_results", 50)
-            playlists = client.get_my_playlists(max_results=max_results)
-            return [TextContent(type="text", text=json.dumps(playlists, indent=2))]
-
-        elif name == "get_playlist_items":
-            playlist_id = arguments["playlist_id"]
-            max_results = arguments.get("max_results", 200)
-            items = client.get_playlist_items(playlist_id, max_results=max_results)
-            return [TextContent(type="text", text=json.dumps(items, indent=2))]
-
-        elif name == "get_video_details":
-            video_ids = arguments["video_ids"]
-            details = client.get_video_details(video_ids)
-            return [TextContent(type="text", text=json.dumps(details, indent=2))]
-
-        elif name == "search_music":
-            query = arguments["query"]
-            max_results = arguments.get("max_results", 10)
-            results = client.search_music(query, max_results=max_results)
-            return [TextContent(type="text", text=json.dumps(results, indent=2))]
-
-        elif name == "analyze_playlist":
-            playlist_id = arguments["playlist_id"]
-            analysis = await analyze_playlist_patterns(client, playlist_id)
-            return [TextContent(type="text", text=json.dumps(analysis, indent=2))]
-
-        else:
-            return [TextContent(type="text", text=f"Unknown tool: {name}")]
+        return await handler(client, arguments)
 
     except FileNotFoundError as e:
         return [TextContent(
@@ -153,37 +190,86 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
         return [TextContent(type="text", text=f"Error: {str(e)}")]
 
 
-async def analyze_playlist_patterns(client: YouTubeClient, playlist_id: str) -> dict:
+async def analyze_playlist_patterns(
+    client: YouTubeClient,
+    playlist_id: str,
+    progress: Optional[Callable[[int, str], Awaitable[None]]] = None,
+) -> dict:
     """Analyze a playlist to extract music taste patterns.
 
+    Args:
+        client: The YouTube client
+        playlist_id: The YouTube playlist ID to analyze
+        progress: Optional callback awaited after every playlist page with
+            the number of tracks scanned and a summary of the top artists so far
+
     Returns:
         Dictionary with artist frequencies, inferred styles, and statistics
     """
-    items = client.get_playlist_items(playlist_id, max_results=500)
+    loop = asyncio.get_running_loop()
 
-    if not items:
-        return {"error": "Playlist is empty or not found"}
-
-    # Count artists
+    # Count artists in a single pass over the streamed playlist pages
     artist_counter = Counter()
     channel_counter = Counter()
-    songs_by_artist: dict[str, list[str]] = {}
+    songs_by_artist: defaultdict[str, list[str]] = defaultdict(list)
+    sample_tracks = []
+    video_ids = []
+    # Video details are fetched per 50 IDs in worker threads while the
+    # remaining playlist pages are still being paginated
+    details_futures = []
+
+    # Pages are pulled in a worker thread so waiting on the API never
+    # blocks the event loop
+    pages = client.iter_playlist_pages(playlist_id, max_results=500)
+    while (page := await asyncio.to_thread(next, pages, None)) is not None:
+        # Per-page names are counted in bulk, in Counter's C implementation
+        page_artists = []
+        page_channels = []
 
-    for item in items:
-        artist = item["artist"]
-        if artist != "Unknown":
-            artist_counter[artist] += 1
-            if artist not in songs_by_artist:
-                songs_by_artist[artist] = []
-            songs_by_artist[artist].append(item["song"])
+        for item in page:
+            artist = item["artist"]
+            if artist != "Unknown":
+                page_artists.append(artist)
+                songs = songs_by_artist[artist]
+                if len(songs) < 3:
+                    songs.append(item["song"])
 
-        channel = item["channel"]
-        if channel:
-            channel_counter[channel] += 1
+            channel = item["channel"]
+            if channel:
+                page_channels.append(channel)
 
-    # Get video details for duration analysis (sample first 50)
-    video_ids = [item["video_id"] for item in items[:50]]
-    video_details = client.get_video_details(video_ids) if video_ids else []
+            if len(sample_tracks) < 10:
+                sample_tracks.append({"artist": artist, "song": item["song"]})
+            video_ids.append(item["video_id"])
+            if len(video_ids) % 50 == 0:
+                details_futures.append(
+                    loop.run_in_executor(None, client.get_video_details, video_ids[-50:])
+                )
+
+        artist_counter.update(page_artists)
+        channel_counter.update(page_channels)
+
+        if progress is not None:
+            top_so_far = ", ".join(a for a, _ in artist_counter.most_common(5)) or "none yet"
+            await progress(
+                len(video_ids),
+                f"Scanned {len(video_ids)} tracks; top artists so far: {top_so_far}",
+            )
+
+    if not video_ids:
+        return {"error": "Playlist is empty or not found"}
+
+    # Get video details for duration analysis
+    remaining_ids = video_ids[len(details_futures) * 50:]
+    if remaining_ids:
+        details_futures.append(
+            loop.run_in_executor(None, client.get_video_details, remaining_ids)
+        )
+    video_details = [
+        video
+        for chunk in await asyncio.gather(*details_futures)
+        for video in chunk
+    ]
 
     total_duration = sum(v.get("duration_seconds", 0) for v in video_details)
     avg_duration = total_duration / len(video_details) if video_details else 0
@@ -193,13 +279,13 @@ async def analyze_playlist_patterns(client: YouTubeClient, playlist_id: str) ->
     top_channels = channel_counter.most_common(10)
 
     return {
-        "total_tracks": len(items),
+        "total_tracks": len(video_ids),
         "unique_artists": len(artist_counter),
         "top_artists": [
             {
                 "artist": artist,
                 "track_count": count,
-                "sample_songs": songs_by_artist.get(artist, [])[:3],
+                "sample_songs": songs_by_artist[artist],
             }
             for artist, count in top_artists
         ],
@@ -212,10 +298,7 @@ async def analyze_playlist_patterns(client: YouTubeClient, playlist_id: str) ->
             "total_minutes": round(total_duration / 60, 1),
             "avg_track_minutes": round(avg_duration / 60, 2),
         },
-        "sample_tracks": [
-            {"artist": item["artist"], "song": item["song"]}
-            for item in items[:10]
-        ],
+        "sample_tracks": sample_tracks,
     }
 
 
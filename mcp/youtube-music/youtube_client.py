@@ -3,10 +3,15 @@
 import os
 import re
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
+import httplib2
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
@@ -15,6 +20,28 @@ SCOPES = ["https://www.googleapis.com/auth/youtube.readonly"]
 CONFIG_DIR = Path(__file__).parent
 TOKEN_FILE = CONFIG_DIR / "token.json"
 CLIENT_SECRETS_FILE = CONFIG_DIR / "client_secrets.json"
+HTTP_TIMEOUT = 30  # seconds
+
+# Precompiled patterns for title parsing
+_CLEAN_SUFFIX_RE = re.compile(
+    r'\s*[\(\[](?:Official\s*)?(?:Music\s*)?(?:Video|Audio|Lyrics?|HD|4K|Live|Remix|Cover)[\)\]]',
+    re.IGNORECASE,
+)
+# Artist - Song / Artist: Song, else Artist | Song; dash-style separators take precedence
+_SPLIT_RE = re.compile(r'^(?:(.+?)\s*[-–—:]\s*(.+?)|(.+?)\s*\|\s*(.+?))$')
+
+# Seconds per ISO 8601 time designator
+_DURATION_UNITS = {"H": 3600, "M": 60, "S": 1}
+
+
+# Shared read-only default for missing nested objects; never mutate
+_EMPTY: dict = {}
+
+
+def _thumb(snippet: dict) -> Optional[str]:
+    """Return the medium thumbnail URL from a snippet, if present."""
+    thumbnails = snippet.get("thumbnails") or _EMPTY
+    return (thumbnails.get("medium") or _EMPTY).get("url")
 
 
 class YouTubeClient:
@@ -22,41 +49,101 @@ class YouTubeClient:
 
     def __init__(self):
         self._service = None
+        self._creds: Optional[Credentials] = None
+        self._creds_lock = threading.Lock()
+        self._local = threading.local()
+        self._page_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="youtube-pages")
 
     def _get_credentials(self) -> Credentials:
-        """Get or refresh OAuth credentials."""
-        creds = None
-
-        if TOKEN_FILE.exists():
-            creds = Credentials.from_authorized_user_file(str(TOKEN_FILE), SCOPES)
+        """Get or refresh OAuth credentials.
 
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            else:
-                if not CLIENT_SECRETS_FILE.exists():
-                    raise FileNotFoundError(
-                        f"OAuth client secrets not found at {CLIENT_SECRETS_FILE}. "
-                        "Please download from Google Cloud Console and save as 'client_secrets.json'"
+        Credentials are kept in memory for as long as they are valid or
+        refreshable. Loading, refreshing and writing the token file happen
+        under a lock since worker threads may call this concurrently.
+        """
+        with self._creds_lock:
+            creds = self._creds
+
+            if creds is None and TOKEN_FILE.exists():
+                creds = Credentials.from_authorized_user_file(str(TOKEN_FILE), SCOPES)
+
+            if not creds or not creds.valid:
+                if creds and creds.expired and creds.refresh_token:
+                    creds.refresh(Request())
+                else:
+                    if not CLIENT_SECRETS_FILE.exists():
+                        raise FileNotFoundError(
+                            f"OAuth client secrets not found at {CLIENT_SECRETS_FILE}. "
+                            "Please download from Google Cloud Console and save as 'client_secrets.json'"
+                        )
+                    flow = InstalledAppFlow.from_client_secrets_file(
+                        str(CLIENT_SECRETS_FILE), SCOPES
                     )
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    str(CLIENT_SECRETS_FILE), SCOPES
-                )
-                creds = flow.run_local_server(port=0)
+                    creds = flow.run_local_server(port=0)
+
+                with open(TOKEN_FILE, "w") as token:
+                    token.write(creds.to_json())
 
-            with open(TOKEN_FILE, "w") as token:
-                token.write(creds.to_json())
+            self._creds = creds
+            return creds
 
-        return creds
+    def _http(self) -> AuthorizedHttp:
+        """Get the authorized HTTP transport for the current thread.
+
+        httplib2 transports are not thread-safe, so each thread keeps its
+        own, reused across requests so TCP/TLS connections stay open.
+        """
+        http = getattr(self._local, "http", None)
+        if http is None:
+            creds = self._get_credentials()
+            http = AuthorizedHttp(creds, http=httplib2.Http(timeout=HTTP_TIMEOUT))
+            self._local.http = http
+        return http
 
     @property
     def service(self):
-        """Lazy-load the YouTube API service."""
+        """Lazy-load the YouTube API service.
+
+        Requests built from the service must be executed with
+        ``http=self._http()`` so they run on the calling thread's transport.
+        """
         if self._service is None:
-            creds = self._get_credentials()
-            self._service = build("youtube", "v3", credentials=creds)
+            self._service = build("youtube", "v3", http=self._http())
         return self._service
 
+    def _iter_pages(self, list_method, max_results: int, **params) -> Iterator[dict]:
+        """Yield response pages of a paginated list call.
+
+        The next page is requested on the client's page-fetching thread as
+        soon as its token is known, so the network fetch overlaps with
+        processing of the current page.
+
+        Args:
+            list_method: Bound API list method, e.g. service.playlists().list
+            max_results: Total number of items to fetch; each page requests
+                only what is still needed and no page is requested once reached
+            **params: Request parameters passed to list_method
+        """
+        def fetch(page_token, remaining):
+            request = list_method(
+                pageToken=page_token, maxResults=min(remaining, 50), **params
+            )
+            return request.execute(http=self._http())
+
+        remaining = max_results
+        future = self._page_executor.submit(fetch, None, remaining)
+        while future is not None:
+            response = future.result()
+            remaining -= len(response.get("items", []))
+
+            page_token = response.get("nextPageToken")
+            if page_token and remaining > 0:
+                future = self._page_executor.submit(fetch, page_token, remaining)
+            else:
+                future = None
+
+            yield response
+
     def get_my_playlists(self, max_results: int = 50) -> list[dict]:
         """Get all playlists from the authenticated user's library.
 
@@ -64,30 +151,24 @@ class YouTubeClient:
             List of playlist dictionaries with id, title, description, item_count
         """
         playlists = []
-        page_token = None
-
-        while True:
-            request = self.service.playlists().list(
-                part="snippet,contentDetails",
-                mine=True,
-                maxResults=min(max_results, 50),
-                pageToken=page_token,
-            )
-            response = request.execute()
+        pages = self._iter_pages(
+            self.service.playlists().list,
+            max_results,
+            part="snippet,contentDetails",
+            mine=True,
+            fields="nextPageToken,items(id,snippet(title,description,thumbnails/medium/url),contentDetails/itemCount)",
+        )
 
+        for response in pages:
             for item in response.get("items", []):
                 playlists.append({
                     "id": item["id"],
                     "title": item["snippet"]["title"],
                     "description": item["snippet"].get("description", ""),
                     "item_count": item["contentDetails"]["itemCount"],
-                    "thumbnail": item["snippet"]["thumbnails"].get("medium", {}).get("url"),
+                    "thumbnail": _thumb(item["snippet"]),
                 })
 
-            page_token = response.get("nextPageToken")
-            if not page_token or len(playlists) >= max_results:
-                break
-
         return playlists[:max_results]
 
     def get_playlist_items(self, playlist_id: str, max_results: int = 200) -> list[dict]:
@@ -100,44 +181,53 @@ class YouTubeClient:
         Returns:
             List of track dictionaries with video_id, title, artist, song, channel
         """
-        items = []
-        page_token = None
-
-        while True:
-            request = self.service.playlistItems().list(
-                part="snippet,contentDetails",
-                playlistId=playlist_id,
-                maxResults=min(max_results, 50),
-                pageToken=page_token,
-            )
-            response = request.execute()
+        return list(self.iter_playlist_items(playlist_id, max_results=max_results))
 
-            for item in response.get("items", []):
-                snippet = item["snippet"]
-                title = snippet.get("title", "")
-                parsed = self._parse_music_title(title)
-
-                items.append({
-                    "video_id": snippet["resourceId"]["videoId"],
-                    "title": title,
-                    "artist": parsed["artist"],
-                    "song": parsed["song"],
-                    "channel": snippet.get("videoOwnerChannelTitle", ""),
-                    "position": snippet.get("position", 0),
-                    "thumbnail": snippet["thumbnails"].get("medium", {}).get("url"),
-                })
+    def iter_playlist_items(self, playlist_id: str, max_results: int = 200) -> Iterator[dict]:
+        """Yield items in a playlist with parsed music metadata, page by page.
 
-            page_token = response.get("nextPageToken")
-            if not page_token or len(items) >= max_results:
-                break
+        Args:
+            playlist_id: The YouTube playlist ID
+            max_results: Maximum number of items to yield
+
+        Yields:
+            Track dictionaries with video_id, title, artist, song, channel
+        """
+        for page in self.iter_playlist_pages(playlist_id, max_results=max_results):
+            yield from page
+
+    def iter_playlist_pages(self, playlist_id: str, max_results: int = 200) -> Iterator[list[dict]]:
+        """Yield pages of playlist items with parsed music metadata.
 
-        return items[:max_results]
+        Args:
+            playlist_id: The YouTube playlist ID
+            max_results: Maximum number of items to yield across all pages
+
+        Yields:
+            Lists of up to 50 track dictionaries, one per API response page
+        """
+        remaining = max_results
+        pages = self._iter_pages(
+            self.service.playlistItems().list,
+            max_results,
+            part="snippet",
+            playlistId=playlist_id,
+            fields="nextPageToken,items(snippet(title,resourceId/videoId,videoOwnerChannelTitle,position,thumbnails/medium/url))",
+        )
+
+        for response in pages:
+            items = response.get("items", [])[:remaining]
+            remaining -= len(items)
+            yield [self._build_playlist_item(item) for item in items]
+
+            if remaining <= 0:
+                return
 
     def get_video_details(self, video_ids: list[str]) -> list[dict]:
         """Get detailed information for videos including duration.
 
         Args:
-            video_ids: List of YouTube video IDs (max 50 per call)
+            video_ids: List of YouTube video IDs
 
         Returns:
             List of video detail dictionaries
@@ -145,32 +235,50 @@ class YouTubeClient:
         if not video_ids:
             return []
 
-        # API allows max 50 IDs per request
-        video_ids = video_ids[:50]
+        # API allows max 50 IDs per request; larger lists are sent as one batch
+        chunks = [video_ids[i:i + 50] for i in range(0, len(video_ids), 50)]
+        requests = [
+            self.service.videos().list(
+                part="snippet,contentDetails,statistics",
+                id=",".join(chunk),
+                fields="items(id,snippet(title,channelTitle,categoryId,tags),contentDetails/duration,statistics(viewCount,likeCount))",
+            )
+            for chunk in chunks
+        ]
 
-        request = self.service.videos().list(
-            part="snippet,contentDetails,statistics",
-            id=",".join(video_ids),
-        )
-        response = request.execute()
+        if len(requests) == 1:
+            responses = [requests[0].execute(http=self._http())]
+        else:
+            responses = [None] * len(requests)
 
-        videos = []
-        for item in response.get("items", []):
-            snippet = item["snippet"]
-            content = item["contentDetails"]
-            stats = item.get("statistics", {})
+            def collect(request_id, response, exception):
+                if exception is not None:
+                    raise exception
+                responses[int(request_id)] = response
 
-            videos.append({
-                "video_id": item["id"],
-                "title": snippet["title"],
-                "channel": snippet["channelTitle"],
-                "duration": content["duration"],  # ISO 8601 duration
-                "duration_seconds": self._parse_duration(content["duration"]),
-                "view_count": int(stats.get("viewCount", 0)),
-                "like_count": int(stats.get("likeCount", 0)),
-                "category_id": snippet.get("categoryId"),
-                "tags": snippet.get("tags", []),
-            })
+            batch = self.service.new_batch_http_request(callback=collect)
+            for index, request in enumerate(requests):
+                batch.add(request, request_id=str(index))
+            batch.execute(http=self._http())
+
+        videos = []
+        for response in responses:
+            for item in response.get("items", []):
+                snippet = item["snippet"]
+                content = item["contentDetails"]
+                stats = item.get("statistics", {})
+
+                videos.append({
+                    "video_id": item["id"],
+                    "title": snippet["title"],
+                    "channel": snippet["channelTitle"],
+                    "duration": content["duration"],  # ISO 8601 duration
+                    "duration_seconds": self._parse_duration(content["duration"]),
+                    "view_count": int(stats.get("viewCount", 0)),
+                    "like_count": int(stats.get("likeCount", 0)),
+                    "category_id": snippet.get("categoryId"),
+                    "tags": snippet.get("tags", []),
+                })
 
         return videos
 
@@ -190,58 +298,79 @@ class YouTubeClient:
             type="video",
             videoCategoryId="10",  # Music category
             maxResults=min(max_results, 25),
+            fields="items(id/videoId,snippet(title,channelTitle,thumbnails/medium/url))",
         )
-        response = request.execute()
+        response = request.execute(http=self._http())
 
         results = []
         for item in response.get("items", []):
             snippet = item["snippet"]
-            parsed = self._parse_music_title(snippet["title"])
+            artist, song = self._parse_music_title(snippet["title"])
 
             results.append({
                 "video_id": item["id"]["videoId"],
                 "title": snippet["title"],
-                "artist": parsed["artist"],
-                "song": parsed["song"],
+                "artist": artist,
+                "song": song,
                 "channel": snippet["channelTitle"],
-                "thumbnail": snippet["thumbnails"].get("medium", {}).get("url"),
+                "thumbnail": _thumb(snippet),
             })
 
         return results
 
     @staticmethod
-    def _parse_music_title(title: str) -> dict:
+    def _build_playlist_item(item: dict) -> dict:
+        """Build a track dictionary from a raw playlistItems resource."""
+        snippet = item["snippet"]
+        get = snippet.get
+        title = get("title", "")
+        artist, song = YouTubeClient._parse_music_title(title)
+
+        return {
+            "video_id": snippet["resourceId"]["videoId"],
+            "title": title,
+            "artist": artist,
+            "song": song,
+            "channel": get("videoOwnerChannelTitle", ""),
+            "position": get("position", 0),
+            "thumbnail": _thumb(snippet),
+        }
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _parse_music_title(title: str) -> tuple[str, str]:
         """Parse 'Artist - Song Title' format common in music videos.
 
+        Results are memoized, since the same titles recur across playlists.
+
         Handles various formats:
         - "Artist - Song"
         - "Artist | Song"
         - "Artist - Song (Official Video)"
         - "Artist - Song [Lyrics]"
-        """
-        # Clean up common suffixes
-        clean_title = re.sub(
-            r'\s*[\(\[](?:Official\s*)?(?:Music\s*)?(?:Video|Audio|Lyrics?|HD|4K|Live|Remix|Cover)[\)\]]',
-            '',
-            title,
-            flags=re.IGNORECASE
-        )
-
-        patterns = [
-            r'^(.+?)\s*[-–—:]\s*(.+?)$',  # Artist - Song or Artist: Song
-            r'^(.+?)\s*[|]\s*(.+?)$',      # Artist | Song
-        ]
 
-        for pattern in patterns:
-            match = re.match(pattern, clean_title.strip())
-            if match:
-                artist = match.group(1).strip()
-                song = match.group(2).strip()
-                # Skip if artist looks like a label/channel name
-                if artist and song and len(artist) < 100 and len(song) < 200:
-                    return {"artist": artist, "song": song}
+        Returns:
+            Tuple of (artist, song)
+        """
+        # Clean up common suffixes; they are always wrapped in () or []
+        if '(' in title or '[' in title:
+            clean_title = _CLEAN_SUFFIX_RE.sub('', title)
+        else:
+            clean_title = title
+
+        match = _SPLIT_RE.match(clean_title.strip())
+        if match:
+            if match.group(1) is not None:
+                artist, song = match.group(1, 2)
+            else:
+                artist, song = match.group(3, 4)
+            artist = artist.strip()
+            song = song.strip()
+            # Skip if artist looks like a label/channel name
+            if artist and song and len(artist) < 100 and len(song) < 200:
+                return artist, song
 
-        return {"artist": "Unknown", "song": title.strip()}
+        return "Unknown", title.strip()
 
     @staticmethod
     def _parse_duration(iso_duration: str) -> int:
@@ -249,15 +378,22 @@ class YouTubeClient:
 
         Example: PT4M30S -> 270 seconds
         """
-        match = re.match(r'PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?', iso_duration)
-        if not match:
+        if not iso_duration.startswith("PT"):
             return 0
 
-        hours = int(match.group(1) or 0)
-        minutes = int(match.group(2) or 0)
-        seconds = int(match.group(3) or 0)
+        total = 0
+        n = 0
+        for ch in iso_duration[2:]:
+            if "0" <= ch <= "9":
+                n = n * 10 + (ord(ch) - 48)
+                continue
+            unit = _DURATION_UNITS.get(ch)
+            if unit is None:
+                break
+            total += n * unit
+            n = 0
 
-        return hours * 3600 + minutes * 60 + seconds
+        return total
 
 
 # Singleton instance